@@ -1,3 +1,4 @@
+import mmap
 import os
 from pathlib import Path
 import re
@@ -18,6 +19,7 @@ from pyscreener.utils import reduce_scores
 from pyscreener.warnings import ChargeWarning, ConformerWarning, SimulationFailureWarning
 from pyscreener.docking import Simulation, DockingRunner, Result
 from pyscreener.docking.dock import utils
+from pyscreener.docking.utils import extract_smiles
 from pyscreener.docking.dock.metadata import DOCKMetadata
 
 try:
@@ -34,6 +36,93 @@ FLEX_DEFN_FILE = DOCK6 / "parameters" / "flex.defn"
 FLEX_DRIVE_FILE = DOCK6 / "parameters" / "flex_drive.tbl"
 DOCK = DOCK6 / "bin" / "dock6"
 
+GRID_SCORE_RE = re.compile(rb"Grid_Score:\s+(\S+)")
+
+DEFAULT_DOCK_PARAMS = {
+    "conformer_search_type": "flex",
+    "write_fragment_libraries": "no",
+    "user_specified_anchor": "no",
+    "limit_max_anchors": "no",
+    "min_anchor_size": 5,
+    "pruning_use_clustering": "yes",
+    "pruning_max_orients": 100,
+    "pruning_clustering_cutoff": 100,
+    "pruning_conformer_score_cutoff": 100,
+    "pruning_conformer_score_scaling_factor": 1,
+    "use_clash_overlap": "no",
+    "write_growth_tree": "no",
+    "use_internal_energy": "yes",
+    "internal_energy_rep_exp": 12,
+    "internal_energy_cutoff": 100,
+    "limit_max_ligands": "no",
+    "skip_molecule": "no",
+    "read_mol_solvation": "no",
+    "calculate_rmsd": "no",
+    "use_rmsd_reference_mol": "no",
+    "use_database_filter": "no",
+    "orient_ligand": "yes",
+    "automated_matching": "yes",
+    "max_orientations": 1000,
+    "critical_points": "no",
+    "chemical_matching": "no",
+    "use_ligand_spheres": "no",
+    "bump_filter": "no",
+    "score_molecules": "yes",
+    "contact_score_primary": "no",
+    "contact_score_secondary": "no",
+    "grid_score_primary": "yes",
+    "grid_score_secondary": "no",
+    "grid_score_rep_rad_scale": 1,
+    "grid_score_vdw_scale": 1,
+    "grid_score_es_scale": 1,
+    "multigrid_score_secondary": "no",
+    "5_score_secondary": "no",
+    "continuous_score_secondary": "no",
+    "footprint_similarity_score_secondary": "no",
+    "pharmacophore_score_secondary": "no",
+    "descriptor_score_secondary": "no",
+    "gbsa_zou_score_secondary": "no",
+    "gbsa_hawkins_score_secondary": "no",
+    "SASA_score_secondary": "no",
+    "amber_score_secondary": "no",
+    "minimize_ligand": "yes",
+    "minimize_anchor": "yes",
+    "minimize_flexible_growth": "yes",
+    "use_advanced_simplex_parameters": "no",
+    "simplex_max_cycles": 1,
+    "simplex_score_converge": 0.1,
+    "simplex_cycle_converge": 1.0,
+    "simplex_trans_step": 1.0,
+    "simplex_rot_step": 0.1,
+    "simplex_tors_step": 10,
+    "simplex_anchor_max_iterations": 500,
+    "simplex_grow_max_iterations": 500,
+    "simplex_grow_tors_premin_iterations": 0,
+    "simplex_random_seed": 0,
+    "simplex_restraint_min": "no",
+    "atom_model": "all",
+    "write_orientations": "no",
+    "num_scored_conformers": 5,
+    "write_conformations": "no",
+    "rank_ligands": "no",
+}
+
+DOCK6_IN_FILE_TAIL = (
+    f"vdw_defn_file {VDW_DEFN_FILE}\n"
+    f"flex_defn_file {FLEX_DEFN_FILE}\n"
+    f"flex_drive_file {FLEX_DRIVE_FILE}\n"
+    "ligand_atom_file {ligand_file}\n"
+    "receptor_site_file {sph_file}\n"
+    "grid_score_grid_prefix {grid_prefix}\n"
+    "ligand_outfile_prefix {outfile_prefix}\n"
+)
+
+DOCK6_IN_FILE_TEMPLATE = (
+    "\n".join(f"{k} {v}" for k, v in DEFAULT_DOCK_PARAMS.items()) + "\n" + DOCK6_IN_FILE_TAIL
+)
+
+_RECEPTOR_CACHE = {}
+
 for f in (VDW_DEFN_FILE, FLEX_DEFN_FILE, FLEX_DRIVE_FILE, DOCK):
     if not f.exists():
         raise MisconfiguredDirectoryError(
@@ -72,6 +161,18 @@ class DOCKRunner(DockingRunner):
         in_path = sim.in_path / "receptors"
         in_path.mkdir(parents=True, exist_ok=True)
 
+        try:
+            mtime = Path(sim.receptor).stat().st_mtime
+        except OSError:
+            mtime = None
+
+        # the sphere/grid pipeline re-reads and re-grids the same receptor on every call, so
+        # reuse the prepared files if this process has already prepared this receptor
+        cached = _RECEPTOR_CACHE.get((str(sim.receptor), str(in_path)))
+        if cached is not None and cached[0] == mtime:
+            sim.metadata.prepared_receptor = cached[1]
+            return sim
+
         try:
             rec_mol2 = utils.prepare_mol2(sim.receptor, in_path)
             rec_pdb = utils.prepare_pdb(sim.receptor, in_path)
@@ -106,6 +207,8 @@ class DOCKRunner(DockingRunner):
             # return None  # should think about whether to handle or just raise
 
         sim.metadata.prepared_receptor = rec_sph, grid_stem
+        _RECEPTOR_CACHE[(str(sim.receptor), str(in_path))] = mtime, sim.metadata.prepared_receptor
+
         return sim
 
     @staticmethod
@@ -177,7 +280,9 @@ class DOCKRunner(DockingRunner):
 
         p_mol2 = Path(sim.in_path) / f"{mol.title or sim.name}.mol2"
 
-        sim.smi = mol.write()
+        # prefer an in-process RDKit parse for the SMILES: it is canonical and free of the
+        # title/newline that openbabel appends to its SMILES output
+        sim.smi = extract_smiles(sim.input_file, fmt) or mol.write().split("\t")[0].strip()
         mol.addh()
         try:
             mol.calccharges(model="gasteiger")
@@ -202,10 +307,9 @@ class DOCKRunner(DockingRunner):
             return None
 
         p_ligand = Path(sim.metadata.prepared_ligand)
-        ligand_name = p_ligand.stem
         sph_file, grid_prefix = sim.metadata.prepared_receptor
 
-        name = f"{Path(sph_file).stem}_{ligand_name}"
+        name = f"{Path(sph_file).stem}_{p_ligand.stem}"
 
         infile, outfile_prefix = DOCKRunner.prepare_input_file(
             p_ligand,
@@ -217,10 +321,10 @@ class DOCKRunner(DockingRunner):
             sim.metadata.dock_params,
         )
 
-        logfile = Path(outfile_prefix).parent / f"{name}.log"
+        logfile = sim.out_path / f"{name}.log"
         argv = [str(DOCK), "-i", str(infile), "-o", str(logfile)]
 
-        ret = sp.run(argv, stdout=sp.PIPE, stderr=sp.PIPE)
+        ret = sp.run(argv, stdout=sp.DEVNULL, stderr=sp.PIPE)
         try:
             ret.check_returncode()
         except sp.SubprocessError:
@@ -239,7 +343,7 @@ class DOCKRunner(DockingRunner):
         return
 
     @staticmethod
-    def parse_logfile(outfile: Union[str, Path]) -> Optional[float]:
+    def parse_logfile(outfile: Union[str, Path]) -> Optional[List[float]]:
         """parse a DOCK log file for the scores of the conformations
 
         Parameters
@@ -249,22 +353,21 @@ class DOCKRunner(DockingRunner):
 
         Returns
         -------
-        Optional[float]
-            the DOCKing score of the ligand. None if no scores were parsed or the log file was
-            unparseable
+        Optional[List[float]]
+            the DOCKing scores of the conformations. None if no scores were parsed or the log file
+            was unparseable
         """
-        try:
-            with open(outfile) as fid:
-                score_lines = [line for line in fid if "Grid_Score" in line]
-        except OSError:
-            pass
-
         scores = []
-        for line in score_lines:
-            try:
-                scores.append(float(line.split()[1]))
-            except ValueError:
-                continue
+        try:
+            with open(outfile, "rb") as fid:
+                with mmap.mmap(fid.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for m in GRID_SCORE_RE.finditer(mm):
+                        try:
+                            scores.append(float(m.group(1)))
+                        except ValueError:
+                            continue
+        except (OSError, ValueError):
+            return None
 
         return scores or None
 
@@ -305,91 +408,32 @@ class DOCKRunner(DockingRunner):
             the prefix of the outfile name. DOCK will automatically name outfiles
             as <outfile_prefix>_scored.mol2
         """
-        DEFAULT_PARAMS = {
-            "conformer_search_type": "flex",
-            "write_fragment_libraries": "no",
-            "user_specified_anchor": "no",
-            "limit_max_anchors": "no",
-            "min_anchor_size": 5,
-            "pruning_use_clustering": "yes",
-            "pruning_max_orients": 100,
-            "pruning_clustering_cutoff": 100,
-            "pruning_conformer_score_cutoff": 100,
-            "pruning_conformer_score_scaling_factor": 1,
-            "use_clash_overlap": "no",
-            "write_growth_tree": "no",
-            "use_internal_energy": "yes",
-            "internal_energy_rep_exp": 12,
-            "internal_energy_cutoff": 100,
-            "limit_max_ligands": "no",
-            "skip_molecule": "no",
-            "read_mol_solvation": "no",
-            "calculate_rmsd": "no",
-            "use_rmsd_reference_mol": "no",
-            "use_database_filter": "no",
-            "orient_ligand": "yes",
-            "automated_matching": "yes",
-            "max_orientations": 1000,
-            "critical_points": "no",
-            "chemical_matching": "no",
-            "use_ligand_spheres": "no",
-            "bump_filter": "no",
-            "score_molecules": "yes",
-            "contact_score_primary": "no",
-            "contact_score_secondary": "no",
-            "grid_score_primary": "yes",
-            "grid_score_secondary": "no",
-            "grid_score_rep_rad_scale": 1,
-            "grid_score_vdw_scale": 1,
-            "grid_score_es_scale": 1,
-            "multigrid_score_secondary": "no",
-            "5_score_secondary": "no",
-            "continuous_score_secondary": "no",
-            "footprint_similarity_score_secondary": "no",
-            "pharmacophore_score_secondary": "no",
-            "descriptor_score_secondary": "no",
-            "gbsa_zou_score_secondary": "no",
-            "gbsa_hawkins_score_secondary": "no",
-            "SASA_score_secondary": "no",
-            "amber_score_secondary": "no",
-            "minimize_ligand": "yes",
-            "minimize_anchor": "yes",
-            "minimize_flexible_growth": "yes",
-            "use_advanced_simplex_parameters": "no",
-            "simplex_max_cycles": 1,
-            "simplex_score_converge": 0.1,
-            "simplex_cycle_converge": 1.0,
-            "simplex_trans_step": 1.0,
-            "simplex_rot_step": 0.1,
-            "simplex_tors_step": 10,
-            "simplex_anchor_max_iterations": 500,
-            "simplex_grow_max_iterations": 500,
-            "simplex_grow_tors_premin_iterations": 0,
-            "simplex_random_seed": 0,
-            "simplex_restraint_min": "no",
-            "atom_model": "all",
-            "write_orientations": "no",
-            "num_scored_conformers": 5,
-            "write_conformations": "no",
-            "rank_ligands": "no",
-        }
-        if params is None:
-            params = DEFAULT_PARAMS
-        else:
-            params = {**params, **DEFAULT_PARAMS}
         name = name or f"{Path(sph_file).stem}_{Path(ligand_file).stem}"
 
         infile = in_path / f"{name}.in"
         outfile_prefix = out_path / name
 
-        with open(infile, "w") as fid:
-            [print(f"{k} {v}", file=fid) for k, v in params.items()]
-            print(f"vdw_defn_file {VDW_DEFN_FILE}", file=fid)
-            print(f"flex_defn_file {FLEX_DEFN_FILE}", file=fid)
-            print(f"flex_drive_file {FLEX_DRIVE_FILE}", file=fid)
-            print(f"ligand_atom_file {ligand_file}", file=fid)
-            print(f"receptor_site_file {sph_file}", file=fid)
-            print(f"grid_score_grid_prefix {grid_prefix}", file=fid)
-            print(f"ligand_outfile_prefix {outfile_prefix}", file=fid)
+        if params is None:
+            template = DOCK6_IN_FILE_TEMPLATE
+        else:
+            params = {**params, **DEFAULT_DOCK_PARAMS}
+            template = (
+                "\n".join(f"{k} {v}" for k, v in params.items()) + "\n" + DOCK6_IN_FILE_TAIL
+            )
+
+        payload = template.format(
+            ligand_file=ligand_file,
+            sph_file=sph_file,
+            grid_prefix=grid_prefix,
+            outfile_prefix=outfile_prefix,
+        ).encode()
+
+        # write through a raw file descriptor to skip TextIOWrapper/BufferedWriter construction
+        # on this hot path
+        fd = os.open(infile, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.write(fd, payload)
+        finally:
+            os.close(fd)
 
         return infile, outfile_prefix
@@ -72,7 +72,7 @@ def prepare_mol2(receptor: str, path: str = ".") -> str:
     p_rec_mol2 = Path(path) / f"{Path(receptor).stem}_withH.mol2"
     argv = ["chimera", "--nogui", "--script", f"{PREP_REC} {receptor} {p_rec_mol2}"]
 
-    ret = sp.run(argv, stdout=sp.PIPE, stderr=sp.PIPE)
+    ret = sp.run(argv, stdout=sp.DEVNULL, stderr=sp.PIPE)
     try:
         ret.check_returncode()
     except sp.SubprocessError:
@@ -122,7 +122,7 @@ def prepare_dms(rec_pdb: str, probe_radius: float = 1.4, path: str = ".") -> str
         f"{WRITE_DMS} {rec_pdb} {probe_radius} {str(p_rec_dms)}",
     ]
 
-    ret = sp.run(argv, stdout=sp.PIPE)
+    ret = sp.run(argv, stdout=sp.DEVNULL)
     try:
         ret.check_returncode()
     except sp.SubprocessError:
@@ -160,7 +160,7 @@ def prepare_sph(
         f"{max_radius:0.1f}",
     ]
 
-    ret = sp.run(argv, stdout=sp.PIPE)
+    ret = sp.run(argv, stdout=sp.DEVNULL)
     try:
         ret.check_returncode()
     except sp.SubprocessError:
@@ -276,7 +276,7 @@ def prepare_box(
 
     showbox_input += f"{TMP_BOX_FILE}\n"
 
-    ret = sp.run([SHOWBOX], input=showbox_input, universal_newlines=True, stdout=sp.PIPE)
+    ret = sp.run([SHOWBOX], input=showbox_input, universal_newlines=True, stdout=sp.DEVNULL)
     try:
         ret.check_returncode()
     except sp.SubprocessError:
@@ -325,7 +325,7 @@ def prepare_grid(
         print(f"vdw_definition_file {VDW_DEFN_FILE}", file=fid)
         print(f"score_grid_prefix  {p_grid_stem}", file=fid)
 
-    ret = sp.run([GRID, "-i", "grid.in", "-o", "gridinfo.out"], stdout=sp.PIPE)
+    ret = sp.run([GRID, "-i", "grid.in", "-o", "gridinfo.out"], stdout=sp.DEVNULL)
     try:
         ret.check_returncode()
     except sp.SubprocessError:
@@ -7,19 +7,40 @@ import re
 import shutil
 import tarfile
 import tempfile
-from typing import Iterable, List, Optional, Sequence, Tuple, Union
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import ray
 from tqdm import tqdm
 
-from pyscreener.utils import Reduction, autobox, pdbfix, reduce_scores, run_on_all_nodes
+from pyscreener.utils import Reduction, autobox, chunks, pdbfix, reduce_scores, run_on_all_nodes
 from pyscreener.docking.sim import Simulation
 from pyscreener.docking.metadata import SimulationMetadata
 from pyscreener.docking.result import Result
 from pyscreener.docking.runner import DockingRunner
 
 
+def _prepare_and_run_batch(
+    runner: DockingRunner,
+    template: Simulation,
+    smis: Sequence[Optional[str]],
+    input_files: Sequence[Optional[str]],
+    names: Sequence[str],
+) -> List[Optional[Result]]:
+    """Reconstruct a batch of Simulations from their shared template and the per-ligand fields
+    and run them serially
+
+    The template (receptor, docking box, metadata, etc.) is identical for every ligand docked
+    against a given receptor, so it is broadcast once through the object store rather than
+    serialized with every task. Batching several ligands into one task amortizes task scheduling
+    and worker setup costs over the whole batch.
+    """
+    return [
+        runner.prepare_and_run(replace(template, smi=smi, input_file=input_file, name=name))
+        for smi, input_file, name in zip(smis, input_files, names)
+    ]
+
+
 class DockingVirtualScreen:
     def __init__(
         self,
@@ -38,6 +59,7 @@ class DockingVirtualScreen:
         receptor_reduction: Union[Reduction, str] = Reduction.BEST,
         k: int = 1,
         verbose: int = 0,
+        batch_size: int = 1,
     ):
         self.runner = runner
         self.runner.validate_metadata(metadata_template)
@@ -58,6 +80,7 @@ class DockingVirtualScreen:
         )
 
         self.k = k
+        self.batch_size = batch_size
 
         self.receptors = receptors or []
         if pdbids is not None:
@@ -78,10 +101,18 @@ class DockingVirtualScreen:
                 flush=True,
             )
 
+        if not ray.is_initialized():
+            try:
+                ray.init("auto")
+            except ConnectionError:
+                ray.init()
+
+        # the input/output dirs are created once per node here so that the workers need not
+        # stat/mkdir them again for every simulation
         self.tmp_dir = tempfile.gettempdir()
 
         ncpu = ncpu if self.runner.is_multithreaded() else 1
-        self.prepare_and_run = ray.remote(num_cpus=1,num_gpus=0.25)(self.runner.prepare_and_run)
+        self.prepare_and_run_batch = ray.remote(num_cpus=ncpu)(_prepare_and_run_batch)
 
         self.simulation_templates = [
             Simulation(
@@ -101,13 +132,10 @@ class DockingVirtualScreen:
             for receptor in self.receptors
         ]
 
-        if not ray.is_initialized():
-            try:
-                ray.init("auto")
-            except ConnectionError:
-                ray.init()
-
         self.simulation_templates = self.prepare_receptors()
+        self.simulation_template_refs = [
+            ray.put(template) for template in self.simulation_templates
+        ]
 
         self.planned_simulationss = []
         self.run_simulationss = []
@@ -256,17 +284,75 @@ class DockingVirtualScreen:
 
         return simss
 
-    def run(self, simulationss: List[List[Simulation]]) -> List[List[Result]]:
-        refss = [[self.prepare_and_run.remote(s) for s in sims] for sims in simulationss]
-
-        resultss = [
-            ray.get(refs) for refs in tqdm(refss, desc="Docking", unit="ligand", smoothing=0.0)
+    def _submit(self, simulationss: List[List[Simulation]]):
+        """Chunk the input simulations into batches and submit one task per batch and receptor"""
+        batches = list(chunks(simulationss, self.batch_size))
+        refss = [
+            [
+                self.prepare_and_run_batch.remote(
+                    self.runner,
+                    template_ref,
+                    [sims[j].smi for sims in batch],
+                    [sims[j].input_file for sims in batch],
+                    [sims[j].name for sims in batch],
+                )
+                for j, template_ref in enumerate(self.simulation_template_refs)
+            ]
+            for batch in batches
         ]
 
+        return batches, refss
+
+    def run_iter(self, simulationss: List[List[Simulation]]) -> Iterator[List[Result]]:
+        """Run the given simulations and lazily yield each ligand's results in input order
+
+        Unlike run(), the results are not retained on the virtual screen, so each result is
+        freed once the caller has consumed it. All tasks are still submitted eagerly, however,
+        and results are yielded in input order, so batches that complete before an earlier,
+        slower batch are held in memory until their turn -- in the worst case (the first batch
+        finishing last) the whole screen's worth. Callers that write results to disk as they
+        arrive should still prefer this method for large libraries. The ligand count is updated
+        so that subsequent calls to setup() continue the ligand numbering.
+
+        Parameters
+        ----------
+        simulationss : List[List[Simulation]]
+            the simulations to run
+
+        Yields
+        ------
+        List[Result]
+            the results of a single ligand against each receptor, in the input ligand ordering
+        """
+        batches, refss = self._submit(simulationss)
+
+        # drain the tasks in completion order so the driver never blocks on a slow batch while
+        # finished ones are waiting, yielding each batch once its tasks have all landed
+        pending = list(chain(*refss))
+        results = {}
+        pbar = tqdm(total=len(pending), desc="Docking", unit="batch", smoothing=0.0)
+
+        for batch, refs in zip(batches, refss):
+            while pending and not all(ref in results for ref in refs):
+                done, pending = ray.wait(pending)
+                results.update(zip(done, ray.get(done)))
+                pbar.update(len(done))
+
+            results_by_receptor = [results.pop(ref) for ref in refs]
+
+            self.num_ligands += len(batch)
+            self.num_simulations += sum(len(sims) for sims in batch)
+
+            for ligand_results in zip(*results_by_receptor):
+                yield list(ligand_results)
+
+        pbar.close()
+
+    def run(self, simulationss: List[List[Simulation]]) -> List[List[Result]]:
+        resultss = list(self.run_iter(simulationss))
+
         self.run_simulationss.extend(simulationss)
         self.resultss.extend(resultss)
-        self.num_ligands += len(resultss)
-        self.num_simulations += len(list(chain(*resultss)))
 
         return resultss
 
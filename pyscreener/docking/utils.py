@@ -1,4 +1,7 @@
 from enum import auto
+from typing import Optional
+
+from rdkit.Chem import AllChem as Chem
 
 from pyscreener.utils import AutoName
 
@@ -6,3 +9,32 @@ from pyscreener.utils import AutoName
 class ScreenType(AutoName):
     DOCK = auto()
     VINA = auto()
+
+
+def extract_smiles(input_file: str, fmt: str) -> Optional[str]:
+    """Extract the canonical SMILES string of the first molecule in the input file using RDKit
+
+    Parameters
+    ----------
+    input_file : str
+        the filepath of a molecular input file containing a single molecule
+    fmt : str
+        the format of the input file
+
+    Returns
+    -------
+    Optional[str]
+        the canonical SMILES string of the molecule. None if the format has no explicit RDKit
+        support or the molecule could not be parsed, in which case callers should fall back to
+        openbabel
+    """
+    if fmt == "sdf":
+        mol = next(Chem.SDMolSupplier(str(input_file)), None)
+    elif fmt == "mol2":
+        mol = Chem.MolFromMol2File(str(input_file))
+    elif fmt == "smi":
+        mol = next(Chem.SmilesMolSupplier(str(input_file), titleLine=False), None)
+    else:
+        return None
+
+    return Chem.MolToSmiles(mol) if mol is not None else None
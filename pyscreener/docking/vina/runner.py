@@ -1,4 +1,3 @@
-from itertools import takewhile
 from pathlib import Path
 import re
 import shutil
@@ -17,6 +16,7 @@ from pyscreener.warnings import ChargeWarning, ConformerWarning, SimulationFailu
 from pyscreener.docking.sim import Simulation
 from pyscreener.docking.runner import DockingRunner
 from pyscreener.docking.result import Result
+from pyscreener.docking.utils import extract_smiles
 from pyscreener.docking.vina.metadata import VinaMetadata
 from pyscreener.docking.vina.utils import Software
 
@@ -26,6 +26,10 @@ if shutil.which("prepare_receptor") is None:
         "See https://github.com/coleygroup/pyscreener#adding-an-executable-to-your-path for more information."
     )
 
+BUFFER_SIZE = 1 << 18
+
+_ARGV_PREFIXES = {}
+
 
 class VinaRunner(DockingRunner):
     @classmethod
@@ -56,6 +60,15 @@ class VinaRunner(DockingRunner):
         name = Path(sim.receptor).with_suffix(".pdbqt").name
         receptor_pdbqt = Path(sim.in_path) / name
 
+        try:
+            # reuse a PDBQT prepared earlier on this node (e.g., by another worker process),
+            # unless the input receptor has been modified since it was written
+            if receptor_pdbqt.stat().st_mtime >= Path(sim.receptor).stat().st_mtime:
+                sim.metadata.prepared_receptor = receptor_pdbqt
+                return sim
+        except OSError:
+            pass
+
         argv = ["prepare_receptor", "-r", sim.receptor, "-o", receptor_pdbqt]
         try:
             ret = sp.run(argv, stderr=sp.PIPE)
@@ -152,7 +165,9 @@ class VinaRunner(DockingRunner):
         mol = next(pybel.readfile(fmt, sim.input_file))
 
         pdbqt = Path(sim.in_path) / f"{mol.title or sim.name}.pdbqt"
-        sim.smi = mol.write()
+        # prefer an in-process RDKit parse for the SMILES: it is canonical and free of the
+        # title/newline that openbabel appends to its SMILES output
+        sim.smi = extract_smiles(sim.input_file, fmt) or mol.write().split("\t")[0].strip()
         try:
             mol.addh()
             mol.calccharges(model="gasteiger")
@@ -182,9 +197,9 @@ class VinaRunner(DockingRunner):
             return None
 
         p_ligand = Path(sim.metadata.prepared_ligand)
-        ligand_name = p_ligand.stem
+        p_receptor = Path(sim.metadata.prepared_receptor)
 
-        name = f"{Path(sim.receptor).stem}_{ligand_name}"
+        name = f"{p_receptor.stem}_{p_ligand.stem}"
 
         argv, _, log = VinaRunner.build_argv(
             ligand=sim.metadata.prepared_ligand,
@@ -201,7 +216,7 @@ class VinaRunner(DockingRunner):
             extra=sim.metadata.extra,
         )
         
-        ret = sp.run(argv, stdout=sp.PIPE, stderr=sp.PIPE)
+        ret = sp.run(argv, stdout=sp.DEVNULL, stderr=sp.PIPE)
         try:
             ret.check_returncode()
         except sp.SubprocessError:
@@ -281,24 +296,38 @@ class VinaRunner(DockingRunner):
         out = path / f"{software.value}_{name}_out.pdbqt"
         log = path / f"{software.value}_{name}.log"
 
-        argv = [
-            software.value,
-            f"--receptor={receptor}",
-            f"--ligand={ligand}",
-            f"--center_x={center[0]}",
-            f"--center_y={center[1]}",
-            f"--center_z={center[2]}",
-            f"--size_x={size[0]}",
-            f"--size_y={size[1]}",
-            f"--size_z={size[2]}",
-            #f"--cpu={ncpu}",
-            f"--out={out}",
-            f"--log={log}",
-            f"--exhaustiveness={exhaustiveness}",
-            f"--num_modes={num_modes}",
-            #f"--energy_range={energy_range}",
-            *extra,
-        ]
+        # everything except the ligand and the output files is constant across all ligands
+        # docked against a given receptor, so build that argv prefix only once per receptor
+        key = (
+            software,
+            str(receptor),
+            tuple(center),
+            tuple(size),
+            ncpu,
+            exhaustiveness,
+            num_modes,
+            tuple(extra),
+        )
+        prefix = _ARGV_PREFIXES.get(key)
+        if prefix is None:
+            prefix = [
+                software.value,
+                f"--receptor={receptor}",
+                f"--center_x={center[0]}",
+                f"--center_y={center[1]}",
+                f"--center_z={center[2]}",
+                f"--size_x={size[0]}",
+                f"--size_y={size[1]}",
+                f"--size_z={size[2]}",
+                f"--cpu={ncpu}",
+                f"--exhaustiveness={exhaustiveness}",
+                f"--num_modes={num_modes}",
+                #f"--energy_range={energy_range}",
+                *extra,
+            ]
+            _ARGV_PREFIXES[key] = prefix
+
+        argv = prefix + [f"--ligand={ligand}", f"--out={out}", f"--log={log}"]
 
         return argv, out, log
 
@@ -317,23 +346,51 @@ class VinaRunner(DockingRunner):
             the scores of the docked binding modes in the ordering of the log file. None if no
             scores were parsed or the log file was unparsable
         """
-        #TABLE_BORDER = "-----+------------+----------+----------"
-        TABLE_BORDER = "----+"
-        try:
-            with open(logfile) as fid:
-                for line in fid:
-                    if TABLE_BORDER in line:
-                        break
+        #TABLE_BORDER = b"-----+------------+----------+----------"
+        TABLE_BORDER = b"----+"
 
-                score_lines = list(takewhile(lambda line: "Writing" not in line, fid))
+        try:
+            with open(logfile, "rb", buffering=BUFFER_SIZE) as fid:
+                tail = b""
+                table = None
+                while table is None:
+                    chunk = fid.read(BUFFER_SIZE)
+                    if not chunk:
+                        return None
+
+                    buf = tail + chunk
+                    i = buf.find(TABLE_BORDER)
+                    if i >= 0:
+                        table = buf[i:] + fid.read()
+                    else:
+                        # retain a tail in case the border straddles a chunk boundary
+                        tail = buf[1 - len(TABLE_BORDER) :]
         except OSError:
             return None
 
+        end = table.find(b"Writing")
+        if end >= 0:
+            table = table[:end]
+        # skip the remainder of the border line itself. A corrupt log may contain arbitrary
+        # bytes, so replace rather than raise on undecodable data
+        table = table[table.find(b"\n") + 1 :].decode(errors="replace")
+
+        # the table is mode | affinity | rmsd_lb | rmsd_ub, so parse it in one shot and
+        # take the affinity column. numpy >= 2.0 raises a ValueError on any non-numeric token
+        # (e.g., a failed run's error message in place of the "Writing" sentinel)
+        try:
+            values = np.fromstring(table, sep=" ")
+            if values.size and values.size % 4 == 0:
+                return values.reshape(-1, 4)[:, 1].tolist()
+        except ValueError:
+            pass
+
+        # fall back to per-line parsing if the table was malformed
         scores = []
-        for line in score_lines:
+        for line in table.splitlines():
             try:
                 scores.append(float(line.split()[1]))
-            except ValueError:
+            except (IndexError, ValueError):
                 continue
 
         return scores or None
@@ -1,14 +1,36 @@
 from __future__ import annotations
 
+from concurrent.futures import ProcessPoolExecutor
 import csv
 from collections.abc import Iterable
 from pathlib import Path
 from typing import Optional, Union
+import warnings
 
 from openbabel import pybel
 from rdkit.Chem import AllChem as Chem
 
 from pyscreener.utils import FileFormat
+from pyscreener.warnings import ConformerWarning
+
+
+def _optimize_and_write_mol(mol: Chem.Mol, filename: str) -> Optional[str]:
+    """embed, optimize, and write a single molecule, returning the filename on success and
+    None if no 3D conformer could be generated
+
+    module-level so that it can be dispatched to a process pool
+    """
+    mol = Chem.AddHs(mol)
+    try:
+        Chem.EmbedMolecule(mol)
+        Chem.MMFFOptimizeMolecule(mol)
+    except ValueError:
+        warnings.warn("Could not generate 3D conformer of molecule!", ConformerWarning)
+        return None
+
+    Chem.MolToMolFile(mol, filename)
+
+    return filename
 
 
 class LigandSupply(Iterable):
@@ -181,11 +203,12 @@ class LigandSupply(Iterable):
 
         fmt = Path(filepath).suffix.strip(".")
 
-        mols = list(pybel.readfile(fmt, filepath))
-        smis = [mol.write() for mol in mols]
+        mols = list(pybel.readfile(fmt, str(filepath)))
+        # write() emits "SMILES\ttitle\n" -- keep only the SMILES itself
+        smis = [mol.write().split("\t")[0].strip() for mol in mols]
 
         if not optimize:
-            return [mol.write() for mol in mols]
+            return smis
 
         mols = [Chem.MolFromSmiles(smi) for smi in smis]
 
@@ -228,15 +251,17 @@ class LigandSupply(Iterable):
         mols: Iterable[Chem.Mol], filepath: Path, path: Optional[Path] = None
     ) -> list[str]:
         base_name = (path or filepath.parent) / filepath.stem
-        # NOTE(degraff): this can parallelized later
-        mols = [Chem.AddHs(mol) for mol in mols]
-        [Chem.EmbedMolecule(mol) for mol in mols]
-        [Chem.MMFFOptimizeMolecule(mol) for mol in mols]
 
+        mols = [mol for mol in mols if mol is not None]
         filenames = [f"{base_name}_{i}.mol" for i in range(len(mols))]
-        [Chem.MolToMolFile(mol, filename) for mol, filename in zip(mols, filenames)]
 
-        return filenames
+        # embedding and optimization are independent, CPU-bound tasks, so farm them out in chunks
+        with ProcessPoolExecutor() as executor:
+            written = executor.map(_optimize_and_write_mol, mols, filenames, chunksize=64)
+
+            # report only this run's successful writes -- a stale file from a previous run must
+            # not stand in for a molecule that failed here
+            return [filename for filename in written if filename is not None]
 
     @staticmethod
     def split_file(filepath: Path, path: Optional[Path] = None) -> list[str]:
@@ -245,8 +270,16 @@ class LigandSupply(Iterable):
 
         mols = list(pybel.readfile(fmt, str(filepath)))
 
-        filenames = [f"{base_name}_{i}.{fmt}" for i in range(len(mols))]
-        [mol.write(fmt, filename, True) for mol, filename in zip(mols, filenames)]
+        # report only this run's successful writes -- a stale file from a previous run must
+        # not stand in for a molecule that failed here
+        filenames = []
+        for i, mol in enumerate(mols):
+            filename = f"{base_name}_{i}.{fmt}"
+            try:
+                mol.write(fmt, filename, True)
+            except IOError:
+                continue
+            filenames.append(filename)
 
         return filenames
 
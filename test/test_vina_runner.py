@@ -110,3 +110,59 @@ def test_run(sim):
     scores = vina.VinaRunner.run(sim)
 
     assert sim.score == reduce_scores(scores, sim.reduction, k=sim.k)
+
+
+VINA_LOG = """\
+mode |   affinity | dist from best mode
+     | (kcal/mol) | rmsd l.b.| rmsd u.b.
+-----+------------+----------+----------
+   1        0.0      0.000      0.000
+   2       -7.5      1.234      2.345
+Writing output ... done.
+"""
+
+
+def test_parse_logfile(tmp_path):
+    logfile = tmp_path / "vina.log"
+    logfile.write_text(VINA_LOG)
+
+    assert vina.VinaRunner.parse_logfile(logfile) == [0.0, -7.5]
+
+
+def test_parse_logfile_keeps_zero_scores(tmp_path):
+    """a score of 0.0 is falsy but legitimate and must not be dropped"""
+    logfile = tmp_path / "vina.log"
+    logfile.write_text(VINA_LOG.replace("-7.5", " 0.0"))
+
+    assert vina.VinaRunner.parse_logfile(logfile) == [0.0, 0.0]
+
+
+def test_parse_logfile_no_writing_sentinel(tmp_path):
+    """a failed run can leave a table followed by an error message instead of 'Writing'"""
+    logfile = tmp_path / "vina.log"
+    logfile.write_text(
+        VINA_LOG.replace("Writing output ... done.", "ERROR: insufficient memory")
+    )
+
+    assert vina.VinaRunner.parse_logfile(logfile) == [0.0, -7.5]
+
+
+def test_parse_logfile_non_utf8(tmp_path):
+    """a corrupt/truncated log must not raise, even if it is not valid UTF-8"""
+    logfile = tmp_path / "vina.log"
+    logfile.write_bytes(
+        VINA_LOG.encode().replace(b"Writing output ... done.", b"\xff\xfe garbage")
+    )
+
+    assert vina.VinaRunner.parse_logfile(logfile) == [0.0, -7.5]
+
+
+def test_parse_logfile_no_table(tmp_path):
+    logfile = tmp_path / "vina.log"
+    logfile.write_text("vina terminated before writing a score table\n")
+
+    assert vina.VinaRunner.parse_logfile(logfile) is None
+
+
+def test_parse_logfile_missing_file(tmp_path):
+    assert vina.VinaRunner.parse_logfile(tmp_path / "nonexistent.log") is None